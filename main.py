@@ -1,13 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from src.api.cache import ResponseCacheMiddleware
 from src.api.routes import buildings, components, emission_factors
+from src.services.building_service import BuildingService
+from src.services.component_service import ComponentService
+from src.services.emission_factor_service import EmissionFactorService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One instance of each service per process, shared by every route; the other services reuse
+    # the same EmissionFactorService rather than building their own
+    app.state.emission_factor_service = EmissionFactorService()
+    app.state.building_service = BuildingService(app.state.emission_factor_service)
+    app.state.component_service = ComponentService(app.state.emission_factor_service)
+    
+    # Calculations read factors from memory; writes to /emission_factors mark the table for reload
+    app.state.emission_factor_service.load_all()
+    yield
 
 app = FastAPI(
     title="Smart Building Emissions API",
     description="Digital Twin Interface for Lifecycle Emissions Calculation",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Serve read-only listing endpoints from memory. Added before CORS so CORS wraps it: cached
+# responses never hold CORS headers, which are set per request for the caller's Origin.
+app.add_middleware(ResponseCacheMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,5 +55,13 @@ async def health_check():
     return {"status": "healthy", "database": "connected"} 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Import string so WEB_CONCURRENCY can start several worker processes
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
\ No newline at end of file
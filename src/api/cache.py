@@ -0,0 +1,108 @@
+import hashlib
+import orjson
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from cachetools import TTLCache
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from src.core.models import ComponentType
+
+# In-memory response bodies for read-only GET endpoints, cleared by the routes that mutate them
+components_cache = TTLCache(maxsize=1024, ttl=60)
+emission_factors_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Responses larger than this are passed through without being cached
+MAX_CACHED_BODY_BYTES = 1024 * 1024
+
+# Query parameters a path accepts and their valid values; other parameters are left out of the cache key
+CacheRule = Tuple[TTLCache, Dict[str, FrozenSet[str]]]
+
+# Cacheable GET paths (exact paths, and prefixes ending in '/') and the cache they use
+_CACHED_PATHS: Dict[str, CacheRule] = {
+    '/components/': (components_cache, {'component_type': frozenset(ct.value for ct in ComponentType)}),
+    '/components/types/available': (components_cache, {}),
+    '/emission_factors/categories/available': (emission_factors_cache, {}),
+}
+_CACHED_PREFIXES: Dict[str, CacheRule] = {
+    '/components/templates/': (components_cache, {}),
+}
+
+def _cache_rule(path: str) -> Optional[CacheRule]:
+    """Get the cache and accepted parameters for a GET path, or None if it is not cacheable"""
+    rule = _CACHED_PATHS.get(path)
+    if rule is not None:
+        return rule
+    for prefix, prefix_rule in _CACHED_PREFIXES.items():
+        if path.startswith(prefix):
+            return prefix_rule
+    return None
+
+def _cache_key(path: str, query_string: bytes, params: Dict[str, FrozenSet[str]]) -> Optional[bytes]:
+    """Key a request by its path and accepted parameters, or None if a parameter value is invalid"""
+    # Later values win, as they do for the route's own parameters
+    query = {}
+    for name, value in parse_qsl(query_string.decode('latin-1'), keep_blank_values=True):
+        if name in params:
+            if value not in params[name]:
+                return None
+            query[name] = value
+    return hashlib.blake2b(path.encode() + b'?' + urlencode(sorted(query.items())).encode()).digest()
+
+def etag_for(row: dict) -> str:
+    """Weak ETag derived from a stored row's content"""
+    digest = hashlib.blake2b(orjson.dumps(row, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+def conditional_response(request: Request, content: dict, etag: str) -> Response:
+    """Answer 304 if the client already holds this ETag, otherwise send the body with it"""
+    if_none_match = request.headers.get('if-none-match', '')
+    if if_none_match == '*' or etag in (tag.strip() for tag in if_none_match.split(',')):
+        return Response(status_code=304, headers={'ETag': etag})
+    return ORJSONResponse(content, headers={'ETag': etag})
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving whitelisted GET responses from an in-memory TTL cache"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            await self.app(scope, receive, send)
+            return
+
+        rule = _cache_rule(scope['path'])
+        key = rule and _cache_key(scope['path'], scope['query_string'], rule[1])
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        cache = rule[0]
+        cached = cache.get(key)
+        if cached is not None:
+            headers, body = cached
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        # Pass the response through untouched, keeping a copy of successful bodies up to the size cap
+        start = {}
+        chunks = []
+        size = 0
+
+        async def send_and_capture(message):
+            nonlocal chunks, size
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body' and start.get('status') == 200 and chunks is not None:
+                body = message.get('body', b'')
+                size += len(body)
+                if size > MAX_CACHED_BODY_BYTES:
+                    chunks = None
+                else:
+                    chunks.append(body)
+                    if not message.get('more_body', False):
+                        cache[key] = (start['headers'], b''.join(chunks))
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
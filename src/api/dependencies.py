@@ -0,0 +1,34 @@
+import orjson
+from fastapi import HTTPException, Request
+from src.services.building_service import BuildingService
+from src.services.component_service import ComponentService
+from src.services.emission_factor_service import EmissionFactorService
+
+def get_building_service(request: Request) -> BuildingService:
+    """Get the shared BuildingService created at startup"""
+    return request.app.state.building_service
+
+def get_component_service(request: Request) -> ComponentService:
+    """Get the shared ComponentService created at startup"""
+    return request.app.state.component_service
+
+def get_emission_factor_service(request: Request) -> EmissionFactorService:
+    """Get the shared EmissionFactorService created at startup"""
+    return request.app.state.emission_factor_service
+
+async def json_list_body(request: Request) -> list:
+    """Parse a JSON array request body with orjson, leaving item checks to the service"""
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        body = None
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON list")
+    return body
+
+async def json_object_list_body(request: Request) -> list:
+    """Parse a JSON array request body whose items must all be objects"""
+    body = await json_list_body(request)
+    if not all(isinstance(item, dict) for item in body):
+        raise HTTPException(status_code=400, detail="Every item in the request body must be a JSON object")
+    return body
@@ -1,34 +1,38 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
 from src.core.models import BuildingComponentUpdate, BuildingCreate, BuildingResponse, EmissionCalculationRequest
+from src.api.dependencies import get_building_service
 from src.services.building_service import BuildingService
 from typing import Optional
 
 router = APIRouter(prefix="/buildings", tags=["buildings"])
-building_service = BuildingService()
 
-@router.post("/", response_model=dict)
-async def create_building(building: BuildingCreate):
+@router.post("/")
+def create_building(building: BuildingCreate, building_service: BuildingService = Depends(get_building_service)):
     """Create a new building digital twin"""
     try:
         result = building_service.create_building(
             name=building.name,
             location=building.location,
-            component_ids_with_quantities=building.components
+            # Validated by BuildingCreate already; the service only needs (component_id, quantity) pairs
+            component_ids_with_quantities=[(link.component_id, link.quantity) for link in building.components]
         )
         return {"message": "Building created", "building_id": result['id']}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/", response_model=dict)
-async def get_buildings(
+@router.get("/")
+def get_buildings(
     name: Optional[str] = Query(None, description="Filter by building name"),
+    include: Optional[str] = Query(None, description="Set to 'components' to embed each building's components"),
+    building_service: BuildingService = Depends(get_building_service),
 ):
     """Get all components, with optional filtering"""
     try:
         if name:
             components = building_service.get_buildings_by_name(name)
         else:
-            buildings = building_service.get_all_buildings()
+            buildings = building_service.get_all_buildings(include_components=include == 'components')
         
         return {
             "count": len(buildings),
@@ -37,11 +41,18 @@ async def get_buildings(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve buildings: {str(e)}")
 
-@router.get("/{building_id}", response_model=dict)
-async def get_building(building_id: str):
+@router.get("/{building_id}")
+def get_building(
+    building_id: str,
+    include: Optional[str] = Query(None, description="Set to 'components' to embed the building's components"),
+    building_service: BuildingService = Depends(get_building_service),
+):
     """Get a specific building by ID"""
     try:
-        building = building_service.get_building(building_id)
+        if include == 'components':
+            building = building_service.get_with_components(building_id)
+        else:
+            building = building_service.get_building(building_id)
         if not building:
             raise HTTPException(status_code=404, detail=f"Building {building_id} not found")
         
@@ -51,8 +62,8 @@ async def get_building(building_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve building: {str(e)}")
 
-@router.post("/{building_id}/components/{component_id}", response_model=dict)
-async def add_component_to_building(building_id: str, component_id: str, quantity: int = 1):
+@router.post("/{building_id}/components/{component_id}")
+def add_component_to_building(building_id: str, component_id: str, quantity: int = 1, building_service: BuildingService = Depends(get_building_service)):
     """Add a component to a building"""
     try:
         result = building_service.add_component_to_building(building_id, component_id, quantity)
@@ -60,8 +71,8 @@ async def add_component_to_building(building_id: str, component_id: str, quantit
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{building_id}/components", response_model=dict)
-async def get_building_components(building_id: str):
+@router.get("/{building_id}/components")
+def get_building_components(building_id: str, building_service: BuildingService = Depends(get_building_service)):
     """Get all components for a building"""
     try:
         building_data = building_service.get_with_components(building_id)
@@ -72,8 +83,8 @@ async def get_building_components(building_id: str):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.put("/{building_id}/components/{component_id}", response_model=dict)
-async def update_component_quantity(building_id: str, component_id: str, update: BuildingComponentUpdate):
+@router.put("/{building_id}/components/{component_id}")
+def update_component_quantity(building_id: str, component_id: str, update: BuildingComponentUpdate, building_service: BuildingService = Depends(get_building_service)):
     """Update the quantity of a component in a building"""
     try:
         result = building_service.update_component_quantity(building_id, component_id, update.quantity)
@@ -81,12 +92,23 @@ async def update_component_quantity(building_id: str, component_id: str, update:
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/{building_id}/calculate", response_model=dict)
-async def calculate_emissions(building_id: str):
+@router.post("/{building_id}/calculate")
+async def calculate_emissions(building_id: str, building_service: BuildingService = Depends(get_building_service)):
     """Calculate emissions for a building with optional real-time modifications"""
     try:
-        results = building_service.calculate_building_emissions(
+        # Both calls read the emission factor table, which may need a blocking reload, so they run in worker threads
+        results = await asyncio.to_thread(building_service.get_cached_emissions, building_id)
+        if results is not None:
+            return results
+        
+        building_data = await building_service.building_loader.load(building_id)
+        if not building_data:
+            raise ValueError(f"Building {building_id} not found")
+        
+        results = await asyncio.to_thread(
+            building_service.calculate_emissions_for,
             building_id, 
+            building_data,
             {}
         )
         return results
@@ -1,18 +1,38 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+import asyncio
+import itertools
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Iterator, Optional
 from src.core.models import (
     ComponentCreate, 
     ComponentResponse, 
     ComponentType,
     ComponentUpdate
 )
+from src.api.cache import components_cache, conditional_response, etag_for
+from src.api.dependencies import get_component_service, json_object_list_body
 from src.services.component_service import ComponentService
 
 router = APIRouter(prefix="/components", tags=["components"])
-component_service = ComponentService()
 
-@router.post("/", response_model=dict)
-async def create_component(component: ComponentCreate):
+# Component types are fixed at import time, so the listing is built once
+_TYPES_PAYLOAD = {
+    "component_types": [{"value": ct.value, "label": ct.value.capitalize()} for ct in ComponentType],
+    "count": len(ComponentType)
+}
+
+def _stream_components(components: Iterator[dict]) -> Iterator[bytes]:
+    """Encode a components listing as JSON one row at a time"""
+    yield b'{"components":['
+    count = 0
+    for component in components:
+        yield (b',' if count else b'') + orjson.dumps(component)
+        count += 1
+    yield b'],"count":%d}' % count
+
+@router.post("/")
+def create_component(component: ComponentCreate, component_service: ComponentService = Depends(get_component_service)):
     """Create a new component definition"""
     try:
         result = component_service.create_component(
@@ -20,6 +40,7 @@ async def create_component(component: ComponentCreate):
             component_type=component.component_type,
             metadata=component.metadata
         )
+        components_cache.clear()
         return {
             "message": "Component created successfully",
             "component_id": result['id'],
@@ -30,43 +51,41 @@ async def create_component(component: ComponentCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create component: {str(e)}")
 
-@router.get("/", response_model=dict)
-async def get_components(
+@router.get("/")
+def get_components(
     component_type: Optional[ComponentType] = Query(None, description="Filter by component type"),
+    component_service: ComponentService = Depends(get_component_service),
 ):
     """Get all components, with optional filtering"""
     try:
-        if component_type:
-            components = component_service.get_components_by_type(component_type)
-        else:
-            components = component_service.get_all_components()
-        
-        return {
-            "count": len(components),
-            "components": components
-        }
+        components = component_service.iter_components(component_type)
+        # Fetch the first page up front so database errors still return a 500
+        first = next(components, None)
+        rows = components if first is None else itertools.chain([first], components)
+        return StreamingResponse(_stream_components(rows), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve components: {str(e)}")
 
-@router.get("/{component_id}", response_model=dict)
-async def get_component(component_id: str):
+@router.get("/{component_id}")
+def get_component(component_id: str, request: Request, component_service: ComponentService = Depends(get_component_service)):
     """Get a specific component by ID"""
     try:
         component = component_service.get_component(component_id)
         if not component:
             raise HTTPException(status_code=404, detail=f"Component {component_id} not found")
         
-        return {"component": component}
+        return conditional_response(request, {"component": component}, etag_for(component))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve component: {str(e)}")
 
-@router.put("/{component_id}", response_model=dict)
-async def update_component(component_id: str, updates: ComponentUpdate):
+@router.put("/{component_id}")
+def update_component(component_id: str, updates: ComponentUpdate, component_service: ComponentService = Depends(get_component_service)):
     """Update a component's properties"""
     try:
-        result = component_service.update_component(component_id, updates.dict(exclude_unset=True))
+        result = component_service.update_component(component_id, updates.model_dump(exclude_unset=True))
+        components_cache.clear()
         return {
             "message": "Component updated successfully",
             "component": result
@@ -76,36 +95,48 @@ async def update_component(component_id: str, updates: ComponentUpdate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update component: {str(e)}")
 
-@router.delete("/{component_id}", response_model=dict)
-async def delete_component(component_id: str):
+@router.delete("/{component_id}")
+def delete_component(component_id: str, component_service: ComponentService = Depends(get_component_service)):
     """Delete a component"""
     try:
         success = component_service.delete_component(component_id)
         if not success:
             raise HTTPException(status_code=404, detail=f"Component {component_id} not found")
         
+        components_cache.clear()
         return {"message": "Component deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete component: {str(e)}")
 
-@router.post("/{component_id}/calculate", response_model=dict)
+@router.post("/{component_id}/calculate")
 async def calculate_component_emissions(
     component_id: str, 
-    quantity: int = Query(1, description="Quantity of the component to calculate emissions for")
+    quantity: int = Query(1, description="Quantity of the component to calculate emissions for"),
+    component_service: ComponentService = Depends(get_component_service),
 ):
     """Calculate emissions for a specific component"""
     try:
-        result = component_service.calculate_component_emissions(component_id, quantity)
-        return result
+        # Both calls read the emission factor table, which may need a blocking reload, so they run in worker threads
+        result = await asyncio.to_thread(component_service.get_cached_emissions, component_id, quantity)
+        if result is not None:
+            return ORJSONResponse(result)
+        
+        component_data = await component_service.component_loader.load(component_id)
+        if not component_data:
+            raise ValueError(f"Component {component_id} not found")
+        
+        result = await asyncio.to_thread(component_service.calculate_emissions_for, component_id, component_data, quantity)
+        # orjson serializes the result dataclass directly, without a jsonable_encoder pass
+        return ORJSONResponse(result)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to calculate emissions: {str(e)}")
 
-@router.get("/templates/{component_type}", response_model=dict)
-async def get_component_template(component_type: ComponentType):
+@router.get("/templates/{component_type}")
+async def get_component_template(component_type: ComponentType, component_service: ComponentService = Depends(get_component_service)):
     """Get a template of required parameters for a specific component type"""
     try:
         template = component_service.get_component_template(component_type)
@@ -116,40 +147,20 @@ async def get_component_template(component_type: ComponentType):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get template: {str(e)}")
 
-@router.get("/types/available", response_model=dict)
+@router.get("/types/available")
 async def get_available_component_types():
     """Get all available component types"""
-    try:
-        types = [{"value": ct.value, "label": ct.value.capitalize()} for ct in ComponentType]
-        return {
-            "component_types": types,
-            "count": len(types)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get component types: {str(e)}")
+    return _TYPES_PAYLOAD
 
-@router.post("/batch-calculate", response_model=dict)
-async def calculate_batch_emissions(components: List[dict]):
+@router.post("/batch-calculate")
+def calculate_batch_emissions(components: list = Depends(json_object_list_body), component_service: ComponentService = Depends(get_component_service)):
     """Calculate emissions for multiple components at once"""
     try:
-        results = []
-        total_emissions = 0.0
-        
-        for component_data in components:
-            component_id = component_data.get('component_id')
-            quantity = component_data.get('quantity', 1)
-            
-            if not component_id:
-                continue
-            
-            result = component_service.calculate_component_emissions(component_id, quantity)
-            results.append(result)
-            total_emissions += result['emissions']
-        
-        return {
-            "total_emissions": total_emissions,
-            "components": results,
-            "count": len(results)
-        }
+        items = [
+            (component_data['component_id'], component_data.get('quantity', 1))
+            for component_data in components
+            if component_data.get('component_id')
+        ]
+        return ORJSONResponse(component_service.calculate_batch_emissions(items))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to calculate batch emissions: {str(e)}")
\ No newline at end of file
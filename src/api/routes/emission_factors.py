@@ -1,20 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request
 from src.core.models import (
     EmissionFactorCreate,
     EmissionFactorUpdate,
     EmissionFactorCategory
 )
+from src.api.cache import conditional_response, etag_for
+from src.api.dependencies import get_emission_factor_service, json_list_body
 from src.services.emission_factor_service import EmissionFactorService
 
 router = APIRouter(prefix="/emission_factors", tags=["emission_factors"])
-emission_factor_service = EmissionFactorService()
 
-@router.post("/", response_model=dict)
-async def create_emission_factor(factor: EmissionFactorCreate):
+# Categories are fixed at import time, so the listing is built once
+_CATEGORIES_PAYLOAD = {
+    "categories": [{"value": cat.value, "label": cat.value.capitalize()} for cat in EmissionFactorCategory],
+    "count": len(EmissionFactorCategory)
+}
+
+@router.post("/")
+def create_emission_factor(factor: EmissionFactorCreate, emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Create a new emission factor"""
     try:
-        result = emission_factor_service.create_emission_factor(factor.dict())
+        result = emission_factor_service.create_emission_factor(factor.model_dump())
         return {
             "message": "Emission factor created successfully",
             "factor_id": result['id'],
@@ -25,8 +31,8 @@ async def create_emission_factor(factor: EmissionFactorCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create emission factor: {str(e)}")
 
-@router.get("/", response_model=dict)
-async def get_emission_factors():
+@router.get("/")
+def get_emission_factors(emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Get emission factors with optional filtering"""
     try:
         factors = emission_factor_service.get_all_emission_factors()
@@ -38,22 +44,22 @@ async def get_emission_factors():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve emission factors: {str(e)}")
 
-@router.get("/{factor_id}", response_model=dict)
-async def get_emission_factor(factor_id: str):
+@router.get("/{factor_id}")
+def get_emission_factor(factor_id: str, request: Request, emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Get a specific emission factor by ID"""
     try:
         factor = emission_factor_service.get_emission_factor(factor_id)
         if not factor:
             raise HTTPException(status_code=404, detail=f"Emission factor {factor_id} not found")
         
-        return {"emission_factor": factor}
+        return conditional_response(request, {"emission_factor": factor}, etag_for(factor))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve emission factor: {str(e)}")
 
-@router.get("/category/{category}", response_model=dict)
-async def get_emission_factors_by_category(category: EmissionFactorCategory):
+@router.get("/category/{category}")
+def get_emission_factors_by_category(category: EmissionFactorCategory, emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Get all emission factors for a specific category"""
     try:
         factors = emission_factor_service.get_emission_factors_by_category(category)
@@ -65,12 +71,12 @@ async def get_emission_factors_by_category(category: EmissionFactorCategory):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve emission factors: {str(e)}")
 
-@router.put("/{factor_id}", response_model=dict)
-async def update_emission_factor(factor_id: str, updates: EmissionFactorUpdate):
+@router.put("/{factor_id}")
+def update_emission_factor(factor_id: str, updates: EmissionFactorUpdate, emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Update an emission factor"""
     try:
         # Remove None values from updates
-        update_data = {k: v for k, v in updates.dict().items() if v is not None}
+        update_data = updates.model_dump(exclude_none=True)
         
         if not update_data:
             raise HTTPException(status_code=400, detail="No update data provided")
@@ -85,8 +91,8 @@ async def update_emission_factor(factor_id: str, updates: EmissionFactorUpdate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update emission factor: {str(e)}")
 
-@router.delete("/{factor_id}", response_model=dict)
-async def delete_emission_factor(factor_id: str):
+@router.delete("/{factor_id}")
+def delete_emission_factor(factor_id: str, emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Delete an emission factor"""
     try:
         success = emission_factor_service.delete_emission_factor(factor_id)
@@ -96,15 +102,17 @@ async def delete_emission_factor(factor_id: str):
         return {"message": "Emission factor deleted successfully"}
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete emission factor: {str(e)}")
 
-@router.post("/bulk-import", response_model=dict)
-async def bulk_import_emission_factors(factors: List[EmissionFactorCreate]):
+@router.post("/bulk-import")
+def bulk_import_emission_factors(factors: list = Depends(json_list_body), emission_factor_service: EmissionFactorService = Depends(get_emission_factor_service)):
     """Import multiple emission factors at once"""
     try:
-        factors_data = [factor.dict() for factor in factors]
-        result = emission_factor_service.bulk_import_factors(factors_data)
+        # Rows are checked one by one in the service so bad rows are reported, not fatal
+        result = emission_factor_service.bulk_import_factors(factors)
         
         return {
             "message": "Bulk import completed",
@@ -113,14 +121,7 @@ async def bulk_import_emission_factors(factors: List[EmissionFactorCreate]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to import emission factors: {str(e)}")
 
-@router.get("/categories/available", response_model=dict)
+@router.get("/categories/available")
 async def get_available_categories():
     """Get all available emission factor categories"""
-    try:
-        categories = [{"value": cat.value, "label": cat.value.capitalize()} for cat in EmissionFactorCategory]
-        return {
-            "categories": categories,
-            "count": len(categories)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get categories: {str(e)}")
+    return _CATEGORIES_PAYLOAD
@@ -1,26 +1,80 @@
+import math
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from dataclasses import fields
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Optional, Tuple, Type, TypeVar
+from src.services.emission_factor_service import _factor_table, _lookup_factor
+
+# Pre-resolved emission factor values keyed by (name, category)
+FactorCache = Dict[Tuple[str, str], float]
+
+MetadataT = TypeVar('MetadataT')
+
+@lru_cache(maxsize=None)
+def _field_names(metadata_type: type) -> FrozenSet[str]:
+    """Get the field names a metadata dataclass declares"""
+    return frozenset(field.name for field in fields(metadata_type))
+
+@lru_cache(maxsize=None)
+def _float_field_names(metadata_type: type) -> FrozenSet[str]:
+    """Get the names of the float fields a metadata dataclass declares"""
+    return frozenset(field.name for field in fields(metadata_type) if field.type is float)
+
+def metadata_from_dict(metadata_type: Type[MetadataT], metadata: Dict[str, Any]) -> MetadataT:
+    """Build a metadata dataclass from stored metadata, ignoring keys it does not declare"""
+    names = _field_names(metadata_type)
+    float_names = _float_field_names(metadata_type)
+    values = {}
+    for key, value in metadata.items():
+        if key not in names:
+            continue
+        if key in float_names:
+            # Coerce once here so calculations do plain float arithmetic
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Metadata field {key} must be a number")
+        values[key] = value
+    return metadata_type(**values)
+
+def round_emissions(emissions: float) -> float:
+    """Round emissions to two decimals (half up) without the generic round()"""
+    return math.floor(emissions * 100 + 0.5) / 100
 
 class Component(ABC):
     """Abstract base class for all building components"""
     
+    # Components are built per calculation, so keep instances free of a __dict__
+    __slots__ = ('name', 'component_type', 'parameters', 'metadata', '_emission_factor')
+    
     def __init__(self, name: str, component_type: str):
         self.name = name
         self.component_type = component_type
         self.parameters: Dict[str, Any] = {}
+        self._emission_factor: Optional[float] = None
     
     @abstractmethod
-    def calculate_emissions(self, quantity: float = 1.0) -> float:
+    def calculate_emissions(self, quantity: float = 1.0, factor_cache: Optional[FactorCache] = None) -> float:
         """Calculate emissions for this component"""
         pass
     
-    def update_parameters(self, new_parameters: Dict[str, Any]) -> None:
-        """Update component parameters"""
-        self.parameters.update(new_parameters)
+    @abstractmethod
+    def factor_key(self) -> Tuple[str, str]:
+        """Get the (name, category) of the emission factor this component uses"""
+        pass
+    
+    def _resolve_emission_factor(self, factor_cache: Optional[FactorCache] = None) -> float:
+        """Get the emission factor from a pre-resolved cache, else the factor table, remembering it per instance"""
+        key = self.factor_key()
+        if factor_cache and key in factor_cache:
+            return factor_cache[key]
+        if self._emission_factor is None:
+            self._emission_factor = _lookup_factor(*key)
+        return self._emission_factor
     
-    def get_parameter(self, key: str, default: Any = None) -> Any:
-        """Get a specific parameter value"""
-        return self.parameters.get(key, default)
+    def validate(self) -> bool:
+        """Check the component's emission factor exists, without calculating emissions"""
+        return self.factor_key() in _factor_table()
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert component to dictionary for serialization"""
@@ -1,65 +1,64 @@
-from .base import Component
-from typing import Dict, Any
-from src.services.emission_factor_service import EmissionFactorService
+from .base import Component, FactorCache
+from dataclasses import dataclass
+from typing import Optional, Tuple
 from src.core.models import EmissionFactorCategory
-from pydantic import BaseModel
 
-class EnergyMetadata(BaseModel):
+# Emission factor category for this component type, resolved once at import
+_CATEGORY = EmissionFactorCategory.ENERGY.value
+
+@dataclass(slots=True, frozen=True)
+class EnergyMetadata:
     energy_source: str
     efficiency: float
     annual_consumption_kwh: float
+    embodied_emissions: float = 0.0
 
 class EnergyComponent(Component):
     """Component for energy consumption systems (HVAC, lighting, etc.)"""
     
-    def __init__(self, name: str, metadata: EnergyMetadata, **kwargs):
+    __slots__ = ()
+    
+    def __init__(self, name: str, metadata: EnergyMetadata):
         super().__init__(name, "energy")
-        self.metadata = {
-            'energy_source': metadata['energy_source'],
-            'efficiency': metadata['efficiency'],
-            'annual_consumption_kwh': metadata['annual_consumption_kwh'],
-            **kwargs
-        }
-        self.emission_factor_service = EmissionFactorService()
+        self.metadata = metadata
     
-    def calculate_emissions(self, quantity: float = 1.0) -> float:
+    def calculate_emissions(self, quantity: float = 1.0, factor_cache: Optional[FactorCache] = None) -> float:
         """Calculate operational emissions for energy consumption"""
         try:
-            emission_factor = self._get_energy_emission_factor()
+            emission_factor = self._get_energy_emission_factor(factor_cache)
 
             # Calculate effective energy consumption considering efficiency
-            effective_consumption = (float(self.metadata['annual_consumption_kwh']) / 
-                                   float(self.metadata['efficiency']))
+            effective_consumption = self.metadata.annual_consumption_kwh / self.metadata.efficiency
 
             # Calculate emissions: energy consumption * emission factor * quantity
-            emissions = float(effective_consumption) * float(emission_factor) * quantity
+            emissions = effective_consumption * emission_factor * quantity
 
             # Add embodied emissions if specified
-            embodied_emissions = self.metadata.get('embodied_emissions', 0)
-            emissions += float(embodied_emissions) * quantity
-            return round(emissions, 2)
+            emissions += self.metadata.embodied_emissions * quantity
+            return emissions
             
-        except KeyError as e:
-            raise ValueError(f"Missing required parameter for energy calculation: {e}")
         except ZeroDivisionError:
             raise ValueError("Efficiency cannot be zero")
     
-    def _get_energy_emission_factor(self) -> float:
+    def factor_key(self) -> Tuple[str, str]:
+        """Get the (name, category) of the energy source emission factor"""
+        return (self.metadata.energy_source, _CATEGORY)
+    
+    def validate(self) -> bool:
+        """Check the energy source has an emission factor and efficiency is non-zero"""
+        return self.metadata.efficiency != 0 and super().validate()
+    
+    def _get_energy_emission_factor(self, factor_cache: Optional[FactorCache] = None) -> float:
         """Get emission factor for the energy source (kg CO₂e per kWh)"""
-        factors = self.emission_factor_service.get_emission_factors_by_name_and_category(self.metadata['energy_source'], EmissionFactorCategory.ENERGY)
-        if not factors:
-            raise ValueError(f"No emission factors found for {self.metadata['energy_source']}")
-        if len(factors) > 1:
-            raise ValueError(f"Multiple emission factors found for {self.metadata['energy_source']}")
-        return float(factors[0]['emission_factor'])
+        return self._resolve_emission_factor(factor_cache)
     
     def get_annual_energy_consumption(self) -> float:
         """Get annual energy consumption in kWh"""
-        return self.metadata['annual_consumption_kwh']
+        return self.metadata.annual_consumption_kwh
     
     def get_efficiency_rating(self) -> str:
         """Get efficiency rating as a descriptive string"""
-        efficiency = self.metadata['efficiency']
+        efficiency = self.metadata.efficiency
         if efficiency >= 0.9:
             return "High Efficiency"
         elif efficiency >= 0.7:
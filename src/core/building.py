@@ -1,5 +1,8 @@
-from typing import List, Dict, Any, Tuple
-from ..components.base import Component
+import logging
+from typing import List, Dict, Any, Optional, Set, Tuple
+from ..components.base import Component, FactorCache, round_emissions
+
+logger = logging.getLogger(__name__)
 
 class Building:
     """Digital twin representation of a building"""
@@ -7,72 +10,129 @@ class Building:
     def __init__(self, name: str, location: str = None):
         self.name = name
         self.location = location
-        self.components: List[Tuple[Component, float]] = []  # (component, quantity)
+        # Components are stored as parallel lists, with indexes by name and by type
+        self._comps: List[Component] = []
+        self._qtys: List[float] = []
+        self._names: List[str] = []
+        self._index: Dict[str, int] = {}  # name -> position of the first component with that name
+        self._by_type: Dict[str, List[Tuple[Component, float]]] = {}
         self.modifications: Dict[str, Any] = {}
+        # Emissions per component position from the last calculation, None until calculated or after a change.
+        # Names need not be unique, so the cache runs parallel to _comps rather than being keyed by name.
+        self._cached_emissions: List[Optional[float]] = []
+        # The factor cache those emissions were calculated with; a different one invalidates them all
+        self._cached_factor_cache: Optional[FactorCache] = None
+    
+    @property
+    def components(self) -> List[Tuple[Component, float]]:
+        """Get the (component, quantity) pairs in the order they were added"""
+        return list(zip(self._comps, self._qtys))
     
     def add_component(self, component: Component, quantity: float = 1.0) -> None:
         """Add a component to the building with specified quantity"""
-        self.components.append((component, quantity))
+        self._index.setdefault(component.name, len(self._comps))
+        self._comps.append(component)
+        self._qtys.append(quantity)
+        self._names.append(component.name)
+        self._by_type.setdefault(component.component_type, []).append((component, quantity))
+        self._cached_emissions.append(None)
     
     def remove_component(self, component_name: str) -> bool:
         """Remove a component by name"""
-        for i, (component, quantity) in enumerate(self.components):
-            if component.name == component_name:
-                self.components.pop(i)
-                return True
-        return False
+        i = self._index.get(component_name)
+        if i is None:
+            return False
+        
+        component = self._comps.pop(i)
+        self._qtys.pop(i)
+        self._names.pop(i)
+        self._cached_emissions.pop(i)
+        
+        # Positions after i have shifted, so rebuild both indexes
+        self._index = {}
+        for j, name in enumerate(self._names):
+            self._index.setdefault(name, j)
+        self._by_type[component.component_type] = [
+            (comp, qty) for comp, qty in zip(self._comps, self._qtys)
+            if comp.component_type == component.component_type
+        ]
+        return True
     
     def apply_modifications(self, modifications: Dict[str, Any]) -> None:
         """Apply real-time modifications to components (digital twin feature)"""
         self.modifications = modifications
         
         # Apply modifications to relevant components
-        for component, quantity in self.components:
+        for i, component in enumerate(self._comps):
             component_mods = modifications.get(component.name, {})
             if component_mods:
-                component.update_parameters(component_mods)
+                component.parameters.update(component_mods)
+                self._cached_emissions[i] = None
+    
+    def clear_cached_emissions(self) -> None:
+        """Forget all cached component emissions, e.g. after emission factors change"""
+        self._cached_emissions = [None] * len(self._comps)
     
-    def calculate_total_emissions(self) -> Tuple[float, Dict[str, Any]]:
-        """Calculate total emissions with breakdown by component"""
+    def factor_keys(self) -> Set[Tuple[str, str]]:
+        """Get the (name, category) emission factors the components need, for one bulk lookup"""
+        return {component.factor_key() for component in self._comps}
+    
+    def calculate_total_emissions(self, factor_cache: Optional[FactorCache] = None) -> Tuple[float, Dict[str, Any]]:
+        """Calculate total emissions with breakdown by component, recalculating only changed components"""
         total_emissions = 0.0
-        breakdown = {}
+        rows = []  # (component, quantity, emissions, error)
+        
+        if factor_cache is not self._cached_factor_cache:
+            self.clear_cached_emissions()
+            self._cached_factor_cache = factor_cache
         
-        for component, quantity in self.components:
+        for i, (component, quantity) in enumerate(zip(self._comps, self._qtys)):
             try:
-                component_emissions = component.calculate_emissions(quantity)
+                component_emissions = self._cached_emissions[i]
+                if component_emissions is None:
+                    component_emissions = component.calculate_emissions(quantity, factor_cache)
+                    self._cached_emissions[i] = component_emissions
                 total_emissions += component_emissions
-                breakdown[component.name] = {
-                    'emissions': component_emissions,
-                    'quantity': quantity,
-                    'type': component.component_type,
-                    'percentage': 0  # Will be calculated after total
-                }
+                rows.append((component, quantity, component_emissions, None))
             except Exception as e:
-                print(f"Error calculating emissions for {component.name}: {e}")
-                breakdown[component.name] = {
-                    'emissions': 0,
-                    'quantity': quantity,
-                    'type': component.component_type,
-                    'error': str(e)
-                }
+                logger.warning("Error calculating emissions for %s: %s", component.name, e)
+                rows.append((component, quantity, 0, str(e)))
         
-        # Calculate percentages
-        if total_emissions > 0:
-            for component_data in breakdown.values():
-                if 'emissions' in component_data and component_data['emissions'] > 0:
-                    component_data['percentage'] = round(
-                        (component_data['emissions'] / total_emissions) * 100, 2
-                    )
+        # Percentages need the total, so each breakdown entry is built once, after the loop
+        scale = 100 / total_emissions if total_emissions > 0 else 0
+        breakdown = {
+            component.name: {
+                'emissions': emissions,
+                'quantity': quantity,
+                'type': component.component_type,
+                'percentage': emissions * scale if emissions > 0 else 0
+            } if error is None else {
+                'emissions': 0,
+                'quantity': quantity,
+                'type': component.component_type,
+                'error': error
+            }
+            for component, quantity, emissions, error in rows
+        }
         
-        return round(total_emissions, 2), breakdown
+        return total_emissions, breakdown
+    
+    def to_report(self, factor_cache: Optional[FactorCache] = None) -> Tuple[float, Dict[str, Any]]:
+        """Calculate total emissions with breakdown, rounded to two decimals for display"""
+        total_emissions, breakdown = self.calculate_total_emissions(factor_cache)
+        for component_data in breakdown.values():
+            component_data['emissions'] = round_emissions(component_data['emissions'])
+            if 'percentage' in component_data:
+                component_data['percentage'] = round_emissions(component_data['percentage'])
+        return round_emissions(total_emissions), breakdown
     
     def get_component_count(self) -> int:
         """Get the number of components in the building"""
-        return len(self.components)
+        return len(self._comps)
     
     def get_components_by_type(self, component_type: str) -> List[Tuple[Component, float]]:
         """Get all components of a specific type"""
-        return [(comp, qty) for comp, qty in self.components if comp.component_type == component_type]
+        return list(self._by_type.get(component_type, ()))
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert building to dictionary for serialization"""
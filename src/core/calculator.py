@@ -1,4 +1,6 @@
-from typing import Dict, Any, List, Tuple
+import heapq
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Tuple
 from ..components.base import Component
 
 class EmissionsCalculator:
@@ -25,7 +27,7 @@ class EmissionsCalculator:
                 'type': component.component_type
             }
         
-        return round(total_emissions, 2), breakdown
+        return total_emissions, breakdown
     
     def compare_scenarios(self, scenario1: Dict[str, Any], scenario2: Dict[str, Any]) -> Dict[str, Any]:
         """Compare two emission scenarios"""
@@ -44,31 +46,35 @@ class EmissionsCalculator:
         }
     
     def calculate_savings_potential(self, current_emissions: float, 
-                                  improvement_scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Calculate potential savings for different improvement scenarios"""
-        results = []
+                                  improvement_scenarios: List[Dict[str, Any]],
+                                  top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Calculate potential savings for different improvement scenarios, best first (only the top_k if given)"""
+        results = (
+            self._scenario_savings(current_emissions, scenario)
+            for scenario in improvement_scenarios
+        )
         
-        for scenario in improvement_scenarios:
-            potential_emissions = scenario.get('potential_emissions', current_emissions)
-            savings = current_emissions - potential_emissions
-            savings_percentage = (savings / current_emissions * 100) if current_emissions > 0 else 0
-            
-            results.append({
-                'scenario_name': scenario.get('name', 'Unknown'),
-                'current_emissions': current_emissions,
-                'potential_emissions': potential_emissions,
-                'savings': round(savings, 2),
-                'savings_percentage': round(savings_percentage, 2),
-                'payback_period': scenario.get('payback_period', 'Unknown')
-            })
+        if top_k is not None:
+            # Partial selection: O(N log k) and only k results kept
+            return heapq.nlargest(top_k, results, key=itemgetter('savings'))
+        return sorted(results, key=itemgetter('savings'), reverse=True)
+    
+    def _scenario_savings(self, current_emissions: float, scenario: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate savings for one improvement scenario"""
+        potential_emissions = scenario.get('potential_emissions', current_emissions)
+        savings = current_emissions - potential_emissions
+        savings_percentage = (savings / current_emissions * 100) if current_emissions > 0 else 0
         
-        return sorted(results, key=lambda x: x['savings'], reverse=True)
+        return {
+            'scenario_name': scenario.get('name', 'Unknown'),
+            'current_emissions': current_emissions,
+            'potential_emissions': potential_emissions,
+            'savings': round(savings, 2),
+            'savings_percentage': round(savings_percentage, 2),
+            'payback_period': scenario.get('payback_period', 'Unknown')
+        }
     
     def validate_component_parameters(self, component: Component) -> bool:
         """Validate that a component has all required parameters"""
-        try:
-            # Try to calculate emissions - if it fails, parameters are invalid
-            test_calculation = component.calculate_emissions(1.0)
-            return test_calculation >= 0
-        except Exception:
-            return False
\ No newline at end of file
+        # Required metadata is checked by the factory; this only checks the factor lookup would succeed
+        return component.validate()
\ No newline at end of file
@@ -1,82 +1,41 @@
-from typing import Dict, Any
-from ..components.base import Component
-from ..components.energy import EnergyComponent
-from ..components.material import MaterialComponent
-from ..components.water import WaterComponent
+import sys
+from typing import Dict, Any, FrozenSet, List, Tuple, Type
+from ..components.base import Component, metadata_from_dict
+from ..components.energy import EnergyComponent, EnergyMetadata
+from ..components.material import MaterialComponent, MaterialMetadata
+from ..components.water import WaterComponent, WaterMetadata
+from .models import ComponentType
 
 class ComponentFactory:
     """Factory for creating component instances"""
     
-    def create_component(self, component_type: str, name: str, **metadata) -> Component:
-        """Create a component instance based on type"""
-        component_type = component_type.lower()
-        
-        if component_type == 'energy':
-            return self._create_energy_component(name, **metadata)
-        elif component_type == 'material':
-            return self._create_material_component(name, **metadata)
-        elif component_type == 'water':
-            return self._create_water_component(name, **metadata)
-        else:
-            raise ValueError(f"Unknown component type: {component_type}")
-    
-    def _create_energy_component(self, name: str, **metadata) -> EnergyComponent:
-        """Create an energy component with validated metadata"""
-        required_params = ['energy_source', 'efficiency', 'annual_consumption_kwh']
-        self._validate_metadata(required_params, metadata['metadata'])
-        
-        return EnergyComponent(name, **metadata)
+    # component type -> (required metadata, metadata dataclass, component class), keyed by interned type values
+    _REGISTRY: Dict[str, Tuple[FrozenSet[str], type, Type[Component]]] = {
+        sys.intern(ComponentType.ENERGY.value): (frozenset(['energy_source', 'efficiency', 'annual_consumption_kwh']), EnergyMetadata, EnergyComponent),
+        sys.intern(ComponentType.MATERIAL.value): (frozenset(['material_name', 'density_kg_m3', 'volume_m3']), MaterialMetadata, MaterialComponent),
+        sys.intern(ComponentType.WATER.value): (frozenset(['annual_consumption_liters', 'water_treatment_factor', 'treatment_type']), WaterMetadata, WaterComponent),
+    }
     
-    def _create_material_component(self, name: str, **metadata) -> MaterialComponent:
-        """Create a material component with validated metadata"""
-        required_params = ['material_name', 'density_kg_m3', 'volume_m3']
-        self._validate_metadata(required_params, metadata['metadata'])
-        
-        return MaterialComponent(name, **metadata)
+    @classmethod
+    def register(cls, component_type: str, required_params: List[str], metadata_type: type, component_class: Type[Component]) -> None:
+        """Register a component type so the factory can create it"""
+        cls._REGISTRY[sys.intern(component_type.lower())] = (frozenset(required_params), metadata_type, component_class)
     
-    def _create_water_component(self, name: str, **metadata) -> WaterComponent:
-        """Create a water component with validated metadata"""
-        required_params = ['annual_consumption_liters', 'water_treatment_factor', 'treatment_type']
-        self._validate_metadata(required_params, metadata['metadata'])
+    def create_component(self, component_type: str, name: str, metadata: Dict[str, Any]) -> Component:
+        """Create a component instance based on type, with validated metadata"""
+        # Stored types are already lower case, so only fall back to lower() on a miss
+        entry = self._REGISTRY.get(component_type)
+        if entry is None:
+            entry = self._REGISTRY.get(component_type.lower())
+        if entry is None:
+            raise ValueError(f"Unknown component type: {component_type}")
         
-        return WaterComponent(name, **metadata)
+        required_params, metadata_type, component_class = entry
+        self._validate_metadata(required_params, metadata)
+        return component_class(name, metadata_from_dict(metadata_type, metadata))
     
-    def _validate_metadata(self, required_params: list, metadata: Dict[str, Any]) -> None:
+    def _validate_metadata(self, required_params: FrozenSet[str], metadata: Dict[str, Any]) -> None:
         """Validate that all required metadata are present"""
-        missing_params = [param for param in required_params if param not in metadata]
+        missing_params = required_params - metadata.keys()
         if missing_params:
-            raise ValueError(f"Missing required metadata: {missing_params}")
-    
-    def get_component_template(self, component_type: str) -> Dict[str, Any]:
-        """Get a template of required metadata for a component type"""
-        templates = {
-            'energy': {
-                'description': 'Energy consumption system',
-                'required_metadata': ['energy_source', 'efficiency', 'annual_consumption_kwh'],
-                'example': {
-                    'energy_source': 'electricity',
-                    'efficiency': 0.85,
-                    'annual_consumption_kwh': 50000
-                }
-            },
-            'material': {
-                'description': 'Building material',
-                'required_metadata': ['material_name', 'density_kg_m3', 'volume_m3'],
-                'example': {
-                    'material_name': 'concrete',
-                    'density_kg_m3': 2400,
-                    'volume_m3': 100
-                }
-            },
-            'water': {
-                'description': 'Water consumption system',
-                'required_metadata': ['annual_consumption_liters', 'water_treatment_factor', 'treatment_type'],
-                'example': {
-                    'annual_consumption_liters': 100000,
-                    'water_treatment_factor': 0.8,
-                    'treatment_type': 'standard'
-                }
-            }
-        }
-        
-        return templates.get(component_type.lower(), {})
\ No newline at end of file
+            raise ValueError(f"Missing required metadata: {sorted(missing_params)}")
\ No newline at end of file
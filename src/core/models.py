@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from dataclasses import dataclass
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -22,12 +23,11 @@ class ComponentUpdate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 class ComponentResponse(ComponentBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class ComponentCalculationRequest(BaseModel):
     component_id: str
     quantity: int = 1
@@ -64,6 +64,16 @@ class BuildingResponse(BuildingBase):
     components: List[BuildingComponentResponse] = []
     created_at: datetime
 
+@dataclass(slots=True)
+class ComponentEmissionsResult:
+    # Built on every calculation, so a slotted dataclass rather than a validated model
+    component_id: str
+    component_name: str
+    component_type: str
+    quantity: float
+    emissions: float
+    unit: str = 'kg CO₂e'
+
 class EmissionCalculationRequest(BaseModel):
     # modifications: Dict[str, Any] = {}
     pass
@@ -92,13 +102,12 @@ class EmissionFactorUpdate(BaseModel):
     source: Optional[str] = None
 
 class EmissionFactorResponse(EmissionFactorBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class EmissionFactorSearch(BaseModel):
     category: Optional[EmissionFactorCategory] = None
     name_contains: Optional[str] = None
@@ -1,27 +1,23 @@
 import os
-from supabase import create_client, Client
+import httpx
+from typing import Iterator, Optional
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class DatabaseHandler:
-    _instance = None
-    _client = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DatabaseHandler, cls).__new__(cls)
-            # Initialize the client when the app is first started
-            cls._initialize_client()
-        return cls._instance
+# HTTP pool for PostgREST calls, sized for the worker threads that run blocking queries
+POOL_MAX_CONNECTIONS = (os.cpu_count() or 1) * 4
+POOL_KEEPALIVE_SECONDS = 60
+QUERY_TIMEOUT_SECONDS = 10
 
+class DatabaseHandler:
     def __init__(self):
-        # Prevent re-initialization of client in existing instance
-        if not hasattr(self, '_initialized'):
-            self._initialized = True
+        # The client is created on first use, so importing this module needs no credentials
+        self._client: Optional[Client] = None
+        self._tables = {}  # table name -> request builder, reusable because each verb starts a new query
     
-    @classmethod
-    def _initialize_client(cls):
+    def _initialize_client(self):
         """Initialize the Supabase client"""
         url = os.environ.get("SUPABASE_URL")
         key = os.environ.get("SUPABASE_KEY")
@@ -29,7 +25,18 @@ class DatabaseHandler:
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
         
-        cls._client = create_client(url, key)
+        http_client = httpx.Client(
+            timeout=httpx.Timeout(QUERY_TIMEOUT_SECONDS, connect=5),
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_CONNECTIONS,
+                keepalive_expiry=POOL_KEEPALIVE_SECONDS
+            ),
+            follow_redirects=True,
+            http2=True
+        )
+        self._client = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+        self._tables = {}
     
     def get(self) -> Client:
         """Return the Supabase client instance"""
@@ -37,21 +44,54 @@ class DatabaseHandler:
             self._initialize_client()
         return self._client
 
+    def table(self, table: str):
+        """Return the request builder for a table, created once per client"""
+        builder = self._tables.get(table)
+        if builder is None:
+            builder = self._tables[table] = self.get().table(table)
+        return builder
+
     def insert(self, table: str, data: dict) -> dict:
-        return self.get().table(table).insert(data).execute().data[0]
+        return self.table(table).insert(data).execute().data[0]
 
     def insert_many(self, table: str, data: list[dict]) -> list[dict]:
-        return self.get().table(table).insert(data).execute().data
+        """Insert all rows in one bulk request, skipping the round trip when there are none"""
+        if not data:
+            return []
+        return self.table(table).insert(data).execute().data
     
     def select(self, table: str, filters: dict = None) -> list:
-        query = self.get().table(table).select('*')
+        query = self.table(table).select('*')
         if filters:
             for key, value in filters.items():
                 query = query.eq(key, value)
         return query.execute().data
     
-    def update(self, table: str, id: str, data: dict) -> dict:
-        return self.get().table(table).update(data).eq('id', id).execute().data[0]
+    def select_pages(self, table: str, filters: dict = None, page_size: int = 1000) -> Iterator[dict]:
+        """Yield matching rows one page at a time, ordered by id so pages don't overlap"""
+        start = 0
+        while True:
+            query = self.table(table).select('*')
+            for key, value in (filters or {}).items():
+                query = query.eq(key, value)
+            rows = query.order('id').range(start, start + page_size - 1).execute().data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            start += page_size
+    
+    def select_in(self, table: str, column: str, values: list) -> list:
+        return self.table(table).select('*').in_(column, values).execute().data
     
-    def delete(self, table: str, id: str) -> dict:
-        return self.get().table(table).delete().eq('id', id).execute().data[0]
\ No newline at end of file
+    def update(self, table: str, id: str, data: dict) -> Optional[dict]:
+        """Update a row and return it as stored, or None if no row has this id"""
+        rows = self.table(table).update(data).eq('id', id).execute().data
+        return rows[0] if rows else None
+    
+    def delete(self, table: str, id: str) -> Optional[dict]:
+        """Delete a row and return it, or None if no row has this id"""
+        rows = self.table(table).delete().eq('id', id).execute().data
+        return rows[0] if rows else None
+
+# The one handler shared by every repository
+db_handler = DatabaseHandler()
\ No newline at end of file
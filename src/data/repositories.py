@@ -1,7 +1,9 @@
-from typing import List, Optional
-from .database import DatabaseHandler
+from threading import RLock
+from typing import Iterator, List, Optional, Tuple
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from .database import db_handler
 from src.core.models import (
-    BuildingComponentLink, 
     BuildingCreate, 
     BuildingResponse, 
     BuildingComponentResponse, 
@@ -16,35 +18,89 @@ from src.core.models import (
 )
 from datetime import datetime
 
+# Reference rows that are read far more often than they change. Each repository clears its cache on
+# every write; the TTL bounds staleness from writes made by other worker processes.
+CACHE_TTL_SECONDS = 300
+_component_cache = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)
+_emission_factor_cache = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)
+# Repositories are also called from worker threads (see BatchLoader)
+_cache_lock = RLock()
+
+# Trust boundary: rows read from the database are our own writes, so repositories return them
+# as plain dicts typed with the *Response models but never validated again (no model
+# construction or response_model per row). Request bodies are validated by the Create/Update
+# models in the routes before they reach create/update here.
 class BaseRepository:
     def __init__(self, table_name: str):
-        self.db = DatabaseHandler()
+        self.db = db_handler
         self.table_name = table_name
+        self._table = self.db.table(table_name)
 
 class ComponentRepository(BaseRepository):
     def __init__(self):
         super().__init__('components')
     
     def create(self, component_data: ComponentCreate) -> ComponentResponse:
-        return self.db.insert(self.table_name, component_data)
+        result = self.db.insert(self.table_name, component_data)
+        self.clear_cache()
+        return result
+    
+    def create_many(self, components_data: List[ComponentCreate]) -> List[ComponentResponse]:
+        """Create several components in a single insert"""
+        result = self.db.insert_many(self.table_name, components_data)
+        self.clear_cache()
+        return result
     
+    @staticmethod
+    def clear_cache() -> None:
+        with _cache_lock:
+            _component_cache.clear()
+    
+    @cached(_component_cache, key=lambda self, component_id: hashkey('id', component_id), lock=_cache_lock)
     def get_by_id(self, component_id: str) -> Optional[ComponentResponse]:
+        return self.read_by_id(component_id)
+    
+    def read_by_id(self, component_id: str) -> Optional[ComponentResponse]:
+        # Uncached, for read-modify-write paths that must not build on a stale row
         results = self.db.select(self.table_name, {'id': component_id})
         return results[0] if results else None
     
+    def get_many(self, component_ids: List[str]) -> List[ComponentResponse]:
+        return self.db.select_in(self.table_name, 'id', component_ids)
+    
     def get_by_type(self, component_type: str) -> List[ComponentResponse]:
         return self.db.select(self.table_name, {'component_type': component_type})
     
     def get_all(self) -> List[ComponentResponse]:
         return self.db.select(self.table_name)
+    
+    def iter_all(self, component_type: Optional[str] = None) -> Iterator[ComponentResponse]:
+        filters = {'component_type': component_type} if component_type else None
+        return self.db.select_pages(self.table_name, filters)
 
     def update(self, component_id: str, updates: ComponentUpdate) -> ComponentResponse:
-        return self.db.update(self.table_name, component_id, updates)
+        result = self.db.update(self.table_name, component_id, updates)
+        self.clear_cache()
+        return result
     
-    def delete(self, component_id: str) -> dict:
-        return self.db.delete(self.table_name, component_id)
+    def delete(self, component_id: str) -> bool:
+        """Delete a component, returning whether it existed"""
+        deleted = self.db.delete(self.table_name, component_id) is not None
+        if deleted:
+            self.clear_cache()
+        return deleted
+
+def _flatten_components(building: dict) -> dict:
+    """Merge each embedded link's component row into the link, so rows are {'quantity', **component}"""
+    building['components'] = [{'quantity': link['quantity'], **link['components']} for link in building['components']]
+    return building
 
 class BuildingRepository(BaseRepository):
+    # PostgREST embedding of each building's component links and component rows
+    WITH_COMPONENTS = '*, components:components_by_building(quantity, components(*))'
+    # The same shape narrowed to the columns an emissions calculation reads
+    FOR_CALCULATION = 'id, name, location, components:components_by_building(quantity, components(name, component_type, metadata))'
+    
     def __init__(self):
         super().__init__('buildings')
         self.components_by_building_repo = ComponentsByBuildingRepository()
@@ -61,17 +117,26 @@ class BuildingRepository(BaseRepository):
         building = building[0]
         return building
     
-    def get_with_components(self, building_id: str) -> Optional[BuildingResponse]:
-        """Get building with all its components"""
-        building = self.db.select(self.table_name, {'id': building_id})
-        if not building:
-            return None
-        
-        building = building[0]
-        components = self.components_by_building_repo.get_components_for_building(building_id)
-        building['components'] = components
-        
-        return building
+    def get_with_components(self, building_id: str, columns: str = WITH_COMPONENTS) -> Optional[BuildingResponse]:
+        """Get building with all its components in a single embedded query"""
+        response = self._table.select(columns).eq('id', building_id).execute()
+        return response.data[0] if response.data else None
+
+    def get_all_with_components(self, building_ids: Optional[List[str]] = None, columns: str = WITH_COMPONENTS) -> List[BuildingResponse]:
+        """Get all buildings, or only the given IDs, with their components in a single embedded query"""
+        query = self._table.select(columns)
+        if building_ids is not None:
+            query = query.in_('id', building_ids)
+        return query.execute().data
+
+    def get_for_calculation(self, building_id: str) -> Optional[BuildingResponse]:
+        """Get a building with the flattened component rows an emissions calculation reads"""
+        building = self.get_with_components(building_id, self.FOR_CALCULATION)
+        return _flatten_components(building) if building else None
+
+    def get_many_for_calculation(self, building_ids: List[str]) -> List[BuildingResponse]:
+        """Get several buildings with the flattened component rows an emissions calculation reads"""
+        return [_flatten_components(building) for building in self.get_all_with_components(building_ids, self.FOR_CALCULATION)]
 
     def get_by_name(self, name: str) -> Optional[BuildingResponse]:
         building = self.db.select(self.table_name, {'name': name})
@@ -96,38 +161,33 @@ class ComponentsByBuildingRepository(BaseRepository):
             'quantity': quantity
         })
 
-    def add_components_to_building(self, building_id: str, components: List[BuildingComponentLink]) -> List[BuildingComponentResponse]:
-        """Add a component to a building"""
+    def add_components_to_building(self, building_id: str, components: List[Tuple[str, int]]) -> List[BuildingComponentResponse]:
+        """Add several (component_id, quantity) links to a building in a single insert"""
         return self.db.insert_many(self.table_name, [
             {
             'building_id': building_id,
-            'component_id': component.component_id,
-            'quantity': component.quantity
-        } for component in components])
+            'component_id': component_id,
+            'quantity': quantity
+        } for component_id, quantity in components])
     
     def get_components_for_building(self, building_id: str) -> List[BuildingComponentResponse]:
-        response = self.db.get().table(self.table_name).select('quantity, components(*)').eq('building_id', building_id).execute()
-        return response.data if response.data else []
+        response = self._table.select('quantity, components(*)').eq('building_id', building_id).execute()
+        return [{'quantity': link['quantity'], **link['components']} for link in response.data]
     
     def remove_component_from_building(self, building_id: str, component_id: str) -> bool:
         """Remove a component from a building"""
-        result = self.db.delete(self.table_name, {
-            'building_id': building_id,
-            'component_id': component_id
-        })
-        return bool(result)
+        result = self._table.delete().eq('building_id', building_id).eq('component_id', component_id).execute()
+        return bool(result.data)
     
     def update_component_quantity(self, building_id: str, component_id: str, quantity: int) -> BuildingComponentUpdateResponse:
         """Update the quantity of a component in a building"""
-        join_record = self.db.select(self.table_name, {
-            'building_id': building_id,
-            'component_id': component_id
-        })
+        # Match the link by (building_id, component_id) directly, in a single round trip
+        result = self._table.update({'quantity': quantity}).eq('building_id', building_id).eq('component_id', component_id).execute()
         
-        if not join_record:
+        if not result.data:
             raise ValueError("Component not found in building")
         
-        return self.db.update(self.table_name, join_record[0]['id'], {'quantity': quantity})
+        return result.data[0]
 
 class EmissionFactorRepository(BaseRepository):
     def __init__(self):
@@ -139,57 +199,81 @@ class EmissionFactorRepository(BaseRepository):
         factor_data['created_at'] = datetime.now().isoformat()
         factor_data['updated_at'] = factor_data['created_at']
         
-        return self.db.insert(self.table_name, factor_data)
+        result = self.db.insert(self.table_name, factor_data)
+        self.clear_cache()
+        return result
+    
+    def create_many(self, factors_data: List[EmissionFactorCreate]) -> List[EmissionFactorResponse]:
+        """Create several emission factors in a single insert"""
+        now = datetime.now().isoformat()
+        result = self.db.insert_many(self.table_name, [
+            {**factor_data, 'created_at': now, 'updated_at': now} for factor_data in factors_data
+        ])
+        self.clear_cache()
+        return result
     
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop cached emission factor reads after the table changes"""
+        with _cache_lock:
+            _emission_factor_cache.clear()
+    
+    @cached(_emission_factor_cache, key=lambda self, factor_id: hashkey('id', factor_id), lock=_cache_lock)
     def get_by_id(self, factor_id: str) -> Optional[EmissionFactorResponse]:
         """Get emission factor by ID"""
         results = self.db.select(self.table_name, {'id': factor_id})
         return results[0] if results else None
     
-    def get_by_category(self, category: str) -> List[EmissionFactorResponse]:
+    @cached(_emission_factor_cache, key=lambda self, category: hashkey('category', category), lock=_cache_lock)
+    def get_by_category(self, category: str) -> Tuple[EmissionFactorResponse, ...]:
         """Get emission factors by category"""
-        return self.db.select(self.table_name, {'category': category})
+        return tuple(self.db.select(self.table_name, {'category': category}))
 
     def get_by_name_and_category(self, name: str, category: str) -> List[EmissionFactorResponse]:
         """Get emission factors by category and source"""
         return self.db.select(self.table_name, {'name': name, 'category': category})
-    
-    def get_all(self) -> List[EmissionFactorResponse]:
+
+    @cached(_emission_factor_cache, key=lambda self: hashkey('all'), lock=_cache_lock)
+    def get_all(self) -> Tuple[EmissionFactorResponse, ...]:
         """Get all emission factors"""
+        # Cached results are shared between callers, so they are returned as tuples
+        return tuple(self.db.select(self.table_name))
+    
+    def read_all(self) -> List[EmissionFactorResponse]:
+        """Get all emission factors straight from the database, bypassing the read cache"""
         return self.db.select(self.table_name)
     
-    def update(self, factor_id: str, updates: EmissionFactorUpdate) -> EmissionFactorResponse:
-        """Update an emission factor"""
+    def update(self, factor_id: str, updates: EmissionFactorUpdate) -> Optional[EmissionFactorResponse]:
+        """Update an emission factor, returning None if it does not exist"""
         updates['updated_at'] = datetime.now().isoformat()
-        return self.db.update(self.table_name, factor_id, updates)
+        result = self.db.update(self.table_name, factor_id, updates)
+        self.clear_cache()
+        return result
     
-    def delete(self, factor_id: str) -> dict:
-        """Delete an emission factor"""
-        return self.db.delete(self.table_name, factor_id)
+    def delete(self, factor_id: str) -> Optional[dict]:
+        """Delete an emission factor, returning None if it does not exist"""
+        result = self.db.delete(self.table_name, factor_id)
+        self.clear_cache()
+        return result
     
     def search(self, category: str = None, name_contains: str = None, 
                min_factor: float = None, max_factor: float = None) -> List[EmissionFactorResponse]:
-        """Search emission factors with filters"""
-        all_factors = self.get_all()
-        results = []
+        """Search emission factors with filters, applied by the database"""
+        query = self._table.select('*')
+        
+        # Filter by category
+        if category:
+            query = query.eq('category', category)
+        
+        # Filter by name contains (case-insensitive), treating LIKE wildcards in the input literally
+        if name_contains:
+            pattern = name_contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.ilike('name', f'%{pattern}%')
         
-        for factor in all_factors:
-            # Filter by category
-            if category and factor['category'] != category:
-                continue
-            
-            # Filter by name contains
-            if name_contains and name_contains.lower() not in factor['name'].lower():
-                continue
-            
-            # Filter by min factor
-            if min_factor is not None and factor['emission_factor'] < min_factor:
-                continue
-            
-            # Filter by max factor
-            if max_factor is not None and factor['emission_factor'] > max_factor:
-                continue
-            
-            results.append(factor)
+        # Filter by min and max factor
+        if min_factor is not None:
+            query = query.gte('emission_factor', min_factor)
+        if max_factor is not None:
+            query = query.lte('emission_factor', max_factor)
         
-        return results
+        return query.execute().data
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set
+from postgrest.exceptions import APIError
+
+class BatchLoader:
+    """Coalesce concurrent load(key) calls into one bulk fetch, DataLoader style"""
+
+    def __init__(self, batch_fn: Callable[[List[str]], Dict[str, Any]], max_batch: int = 64, max_wait: float = 0.002):
+        # batch_fn is a synchronous bulk fetch returning {key: row}; it runs in a worker thread
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Running fetches, referenced until done so they are not garbage-collected mid-flight
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: str) -> Optional[Any]:
+        """Get the row for a key, or None if the bulk fetch did not return it"""
+        # Keys are UUIDs, which the database matches case-insensitively but returns in lower case
+        key = key.strip().lower()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._dispatch)
+
+        return await future
+
+    def _dispatch(self) -> None:
+        """Send every pending key to the bulk fetch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: Dict[str, List[asyncio.Future]]) -> None:
+        """Run one bulk fetch and resolve the waiting callers"""
+        try:
+            results = await asyncio.to_thread(self.batch_fn, list(pending))
+        except Exception as e:
+            if isinstance(e, APIError) and len(pending) > 1:
+                # PostgREST rejects the whole filter over one bad key (e.g. a malformed id), so fetch each
+                # key on its own and let only that key's callers see the error. Transport errors fail the
+                # batch as a whole rather than retrying every key against a database that is not answering.
+                await asyncio.gather(*(self._run({key: futures}) for key, futures in pending.items()))
+                return
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(key))
@@ -1,40 +1,55 @@
 
-from typing import List, Dict, Any
+import logging
+from threading import Lock
+from typing import List, Dict, Any, Optional, Tuple
+from cachetools import TTLCache
 from src.data.repositories import (
     BuildingRepository, 
-    BuildingResponse, 
-    BuildingComponentResponse, 
-    BuildingComponentUpdateResponse, 
     ComponentRepository, 
     ComponentsByBuildingRepository
 )
 from src.core.building import Building
 from src.core.factory import ComponentFactory
+from src.services.batchloader import BatchLoader
+from src.services.emission_factor_service import EmissionFactorService
 from src.core.models import (
-    BuildingComponentLink, 
     BuildingResponse, 
     BuildingComponentUpdateResponse
 )
 
+logger = logging.getLogger(__name__)
+
+# Emission results of unmodified buildings keyed by building ID, stored with the factor table they were
+# calculated from. Entries are dropped when a building's components change; the TTL bounds staleness
+# from writes made by other worker processes.
+_emissions_cache = TTLCache(maxsize=1024, ttl=300)
+_emissions_lock = Lock()
+
 class BuildingService:
-    def __init__(self):
+    def __init__(self, emission_factor_service: Optional[EmissionFactorService] = None):
         self.building_repo = BuildingRepository()
         self.component_repo = ComponentRepository()
         self.components_by_building_repo = ComponentsByBuildingRepository()
         self.factory = ComponentFactory()
+        self.emission_factor_service = emission_factor_service or EmissionFactorService()
+        # Coalesces concurrent building reads from the API into one query
+        self.building_loader = BatchLoader(self.bulk_get_with_components)
     
-    def create_building(self, name: str, location: str, component_ids_with_quantities: List[BuildingComponentLink] = None) -> BuildingResponse:
+    def create_building(self, name: str, location: str, component_ids_with_quantities: List[Tuple[str, int]] = None) -> BuildingResponse:
         """Create a new building and add components to it"""
         building_data = self.building_repo.create({
             'name': name,
             'location': location
         })
 
-        self.components_by_building_repo.add_components_to_building(building_data['id'], component_ids_with_quantities)
+        if component_ids_with_quantities:
+            self.components_by_building_repo.add_components_to_building(building_data['id'], component_ids_with_quantities)
         
         return building_data
 
-    def get_all_buildings(self) -> List[BuildingResponse]:
+    def get_all_buildings(self, include_components: bool = False) -> List[BuildingResponse]:
+        if include_components:
+            return self.building_repo.get_all_with_components()
         return self.building_repo.get_all()
     
     def get_buildings_by_name(self, name: str) -> List[BuildingResponse]:
@@ -45,30 +60,70 @@ class BuildingService:
 
     def get_with_components(self, building_id: str) -> BuildingResponse:
         return self.building_repo.get_with_components(building_id)
+
+    def bulk_get_with_components(self, building_ids: List[str]) -> Dict[str, BuildingResponse]:
+        """Get many buildings with the component columns calculations need in a single query, keyed by ID"""
+        if not building_ids:
+            return {}
+        buildings = self.building_repo.get_many_for_calculation(list(set(building_ids)))
+        return {str(building['id']): building for building in buildings}
     
     def add_component_to_building(self, building_id: str, component_id: str, quantity: int = 1) -> BuildingResponse:
         """Add a component to an existing building"""
-        return self.components_by_building_repo.add_component_to_building(building_id, component_id, quantity)
+        result = self.components_by_building_repo.add_component_to_building(building_id, component_id, quantity)
+        self.clear_emissions_cache(building_id)
+        return result
     
     def update_component_quantity(self, building_id: str, component_id: str, quantity: int) -> BuildingComponentUpdateResponse:
         """Update the quantity of a component in a building"""
-        return self.components_by_building_repo.update_component_quantity(building_id, component_id, quantity)
+        result = self.components_by_building_repo.update_component_quantity(building_id, component_id, quantity)
+        self.clear_emissions_cache(building_id)
+        return result
+    
+    @staticmethod
+    def clear_emissions_cache(building_id: Optional[str] = None) -> None:
+        """Forget the cached emission results of one building, or of all buildings"""
+        with _emissions_lock:
+            if building_id is None:
+                _emissions_cache.clear()
+            else:
+                _emissions_cache.pop(str(building_id), None)
+    
+    def get_cached_emissions(self, building_id: str) -> Optional[Dict[str, Any]]:
+        """Get the last emission result of an unmodified building if neither it nor the factor table has changed"""
+        with _emissions_lock:
+            entry = _emissions_cache.get(str(building_id))
+        if entry is None:
+            return None
+        factor_table, result = entry
+        return result if factor_table is self.emission_factor_service.get_factor_table() else None
 
     def calculate_building_emissions(self, building_id: str, modifications: Dict[str, Any] = None) -> Dict[str, Any]:
-        building_data = self.building_repo.get_with_components(building_id)
+        if not modifications:
+            cached = self.get_cached_emissions(building_id)
+            if cached is not None:
+                return cached
+        
+        building_data = self.building_repo.get_for_calculation(building_id)
         if not building_data:
             raise ValueError(f"Building {building_id} not found")
         
+        return self.calculate_emissions_for(building_id, building_data, modifications)
+
+    def calculate_emissions_for(self, building_id: str, building_data: BuildingResponse, modifications: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Calculate emissions for a building that has already been loaded with its components"""
         # Create Building instance
         building = Building(building_data['name'], building_data['location'])
         
         # Add components to building with their quantities
+        create_component = self.factory.create_component
         for component_data in building_data.get('components', []):
-            print(f"Component data: {component_data}")
-            component = self.factory.create_component(
-                component_type=component_data['components']['component_type'],
-                name=component_data['components']['name'],
-                metadata=component_data['components']['metadata']
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Component data: %s", component_data)
+            component = create_component(
+                component_type=component_data['component_type'],
+                name=component_data['name'],
+                metadata=component_data['metadata']
             )
             # Use the quantity from the join table, default to 1.0
             quantity = component_data.get('quantity', 1)
@@ -78,13 +133,19 @@ class BuildingService:
         if modifications:
             building.apply_modifications(modifications)
         
-        # Calculate total emissions with breakdown
-        total_emissions, breakdown = building.calculate_total_emissions()
+        # Resolve every component's emission factor in one lookup, then calculate with breakdown
+        factor_table = self.emission_factor_service.get_factor_table()
+        factor_cache = self.emission_factor_service.bulk_get_by_sources(list(building.factor_keys()))
+        total_emissions, breakdown = building.to_report(factor_cache)
         
-        return {
+        result = {
             'total_emissions': total_emissions,
             'breakdown': breakdown,
             'building_id': building_id,
             'component_count': len(building_data.get('components', [])),
             'modifications_applied': modifications or {}
-        }
\ No newline at end of file
+        }
+        if not modifications:
+            with _emissions_lock:
+                _emissions_cache[str(building_id)] = (factor_table, result)
+        return result
\ No newline at end of file
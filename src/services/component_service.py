@@ -1,12 +1,83 @@
-from typing import List, Dict, Any, Optional
+import hashlib
+import orjson
+from threading import Lock
+from typing import List, Dict, Any, FrozenSet, Iterator, Optional, Tuple
+from cachetools import LRUCache, TTLCache
 from src.data.repositories import ComponentRepository
+from src.components.base import Component, round_emissions
 from src.core.factory import ComponentFactory
-from src.core.models import ComponentType, ComponentResponse, ComponentUpdate
+from src.core.models import ComponentEmissionsResult, ComponentType, ComponentResponse, ComponentUpdate
+from src.services.batchloader import BatchLoader
+from src.services.building_service import BuildingService
+from src.services.emission_factor_service import EmissionFactorService
+
+# Metadata templates per component type, shared read-only by every caller
+_COMPONENT_TEMPLATES: Dict[ComponentType, Dict[str, Any]] = {
+    ComponentType.ENERGY: {
+        "description": "Energy consumption system",
+        "required_metadata": ["energy_source", "efficiency", "annual_consumption_kwh"],
+        "optional_metadata": ["lifespan_years", "maintenance_factor"],
+        "example": {
+            "energy_source": "electricity",
+            "efficiency": 0.85,
+            "annual_consumption_kwh": 50000
+        }
+    },
+    ComponentType.MATERIAL: {
+        "description": "Building material",
+        "required_metadata": ["material_name", "density_kg_m3", "volume_m3"],
+        "optional_metadata": ["recycling_rate", "transport_distance_km"],
+        "example": {
+            "material_name": "concrete",
+            "density_kg_m3": 2400,
+            "volume_m3": 100
+        }
+    },
+    ComponentType.WATER: {
+        "description": "Water consumption system",
+        "required_metadata": ["annual_consumption_liters", "water_treatment_factor", "treatment_type"],
+        "optional_metadata": ["recycling_rate", "efficiency"],
+        "example": {
+            "annual_consumption_liters": 100000,
+            "water_treatment_factor": 0.8,
+            "treatment_type": "standard"
+        }
+    },
+    ComponentType.TRANSPORT: {
+        "description": "Transportation system",
+        "required_metadata": ["vehicle_type", "fuel_type", "annual_distance_km"],
+        "optional_metadata": ["fuel_efficiency", "load_factor"],
+        "example": {
+            "vehicle_type": "delivery_truck",
+            "fuel_type": "diesel",
+            "annual_distance_km": 20000
+        }
+    }
+}
+
+# Required metadata per component type, for a set check when components are created
+_REQUIRED_BY_TYPE: Dict[ComponentType, FrozenSet[str]] = {
+    component_type: frozenset(template['required_metadata'])
+    for component_type, template in _COMPONENT_TEMPLATES.items()
+}
+
+# Components built from stored rows, keyed by (type, name, metadata digest). Each entry keeps the factor
+# table it was built under, since a component remembers its resolved emission factor.
+_component_instances = LRUCache(maxsize=4096)
+_component_instances_lock = Lock()
+
+# Emission results keyed by (component ID, quantity), stored with the factor table they were calculated from.
+# Entries are dropped when any component changes; the TTL bounds staleness from other worker processes.
+_emissions_cache = TTLCache(maxsize=10000, ttl=300)
+_emissions_lock = Lock()
 
 class ComponentService:
-    def __init__(self):
+    def __init__(self, emission_factor_service: Optional[EmissionFactorService] = None):
         self.component_repo = ComponentRepository()
+        self.emission_factor_service = emission_factor_service or EmissionFactorService()
         self.factory = ComponentFactory()
+        # Coalesces concurrent single-component reads from the API into one query
+        self.component_loader = BatchLoader(self.bulk_get)
     
     def create_component(self, name: str, component_type: ComponentType, metadata: Dict[str, Any]) -> ComponentResponse:
         """Create a new component definition"""
@@ -25,6 +96,12 @@ class ComponentService:
         """Get a specific component by ID"""
         return self.component_repo.get_by_id(component_id)
     
+    def bulk_get(self, component_ids: List[str]) -> Dict[str, ComponentResponse]:
+        """Get many components in a single query, keyed by ID"""
+        if not component_ids:
+            return {}
+        return {str(component['id']): component for component in self.component_repo.get_many(list(set(component_ids)))}
+    
     def get_components_by_type(self, component_type: ComponentType) -> List[ComponentResponse]:
         """Get all components of a specific type"""
         return self.component_repo.get_by_type(component_type.value)
@@ -33,9 +110,15 @@ class ComponentService:
         """Get all components"""
         return self.component_repo.get_all()
     
+    def iter_components(self, component_type: Optional[ComponentType] = None) -> Iterator[ComponentResponse]:
+        """Iterate over all components, optionally of one type, fetching them page by page"""
+        return self.component_repo.iter_all(component_type.value if component_type else None)
+    
     def update_component(self, component_id: str, updates: ComponentUpdate) -> ComponentResponse:
         """Update a component's metadata"""
-        component = self.component_repo.get_by_id(component_id)
+        # Metadata is merged onto the stored row, so read it uncached: a cached row could predate
+        # another worker's update, which the merge would then undo
+        component = self.component_repo.read_by_id(component_id)
         if not component:
             raise ValueError(f"Component {component_id} not found")
 
@@ -43,95 +126,139 @@ class ComponentService:
         if 'name' in updates:
             update_data['name'] = updates['name']
 
-        updated_metadata = {**component['metadata'], **updates.get('metadata', {})}
-
-        update_data['metadata'] = updated_metadata
+        # Only rewrite the metadata column when metadata changes were sent
+        if updates.get('metadata'):
+            updated_metadata = dict(component['metadata'])
+            updated_metadata.update(updates['metadata'])
+            update_data['metadata'] = updated_metadata
+        
+        if not update_data:
+            return component
         
-        return self.component_repo.update(component_id, update_data)
+        result = self.component_repo.update(component_id, update_data)
+        self.clear_emissions_cache()
+        # Any building may use this component
+        BuildingService.clear_emissions_cache()
+        return result
     
     def delete_component(self, component_id: str) -> bool:
         """Delete a component"""
-        result = self.component_repo.delete(component_id)
-        return bool(result)
+        deleted = self.component_repo.delete(component_id)
+        if deleted:
+            self.clear_emissions_cache()
+            BuildingService.clear_emissions_cache()
+        return deleted
+    
+    @staticmethod
+    def clear_emissions_cache() -> None:
+        """Forget every cached component emission result"""
+        with _emissions_lock:
+            _emissions_cache.clear()
     
-    def calculate_component_emissions(self, component_id: str, quantity: int = 1) -> Dict[str, Any]:
+    def get_cached_emissions(self, component_id: str, quantity: int = 1) -> Optional[ComponentEmissionsResult]:
+        """Get the last emission result for a component and quantity if the factor table has not changed"""
+        with _emissions_lock:
+            entry = _emissions_cache.get((str(component_id), quantity))
+        if entry is None:
+            return None
+        factor_table, result = entry
+        return result if factor_table is self.emission_factor_service.get_factor_table() else None
+    
+    def calculate_component_emissions(self, component_id: str, quantity: int = 1) -> ComponentEmissionsResult:
         """Calculate emissions for a single component"""
+        cached = self.get_cached_emissions(component_id, quantity)
+        if cached is not None:
+            return cached
+        
         component_data = self.component_repo.get_by_id(component_id)
         if not component_data:
             raise ValueError(f"Component {component_id} not found")
 
-        component = self.factory.create_component(
-            component_type=component_data['component_type'],
-            name=component_data['name'],
-            metadata=component_data['metadata']
+        return self.calculate_emissions_for(component_id, component_data, quantity)
+    
+    def calculate_emissions_for(self, component_id: str, component_data: ComponentResponse, quantity: int = 1) -> ComponentEmissionsResult:
+        """Calculate emissions for a component that has already been loaded"""
+        factor_table = self.emission_factor_service.get_factor_table()
+        component = self._build_component(component_data)
+        emissions = component.calculate_emissions(quantity)
+        
+        result = self._emissions_result(component_id, component_data, quantity, emissions)
+        with _emissions_lock:
+            _emissions_cache[(str(component_id), quantity)] = (factor_table, result)
+        return result
+    
+    def calculate_batch_emissions(self, items: List[Tuple[str, int]]) -> Dict[str, Any]:
+        """Calculate emissions for (component_id, quantity) pairs with one component and one factor query"""
+        components_data = self.bulk_get([str(component_id) for component_id, _ in items])
+        
+        components: Dict[str, Component] = {}
+        for component_id, _ in items:
+            key = str(component_id)
+            if key not in components_data:
+                raise ValueError(f"Component {component_id} not found")
+            if key not in components:
+                components[key] = self._build_component(components_data[key])
+        
+        factor_cache = self.emission_factor_service.bulk_get_by_sources(
+            [component.factor_key() for component in components.values()]
         )
         
-        emissions = component.calculate_emissions(quantity)
+        results = []
+        total_emissions = 0.0
+        for component_id, quantity in items:
+            key = str(component_id)
+            emissions = components[key].calculate_emissions(quantity, factor_cache)
+            results.append(self._emissions_result(component_id, components_data[key], quantity, emissions))
+            total_emissions += emissions
         
         return {
-            'component_id': component_id,
-            'component_name': component_data['name'],
-            'component_type': component_data['component_type'],
-            'quantity': quantity,
-            'emissions': emissions,
-            'unit': 'kg CO₂e'
+            'total_emissions': round_emissions(total_emissions),
+            'components': results,
+            'count': len(results)
         }
     
+    def _build_component(self, component_data: ComponentResponse) -> Component:
+        """Create a calculable component instance from a stored component row, reusing an identical one"""
+        metadata = component_data['metadata']
+        key = (
+            component_data['component_type'],
+            component_data['name'],
+            hashlib.blake2b(orjson.dumps(metadata, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+        )
+        factor_table = self.emission_factor_service.get_factor_table()
+        with _component_instances_lock:
+            entry = _component_instances.get(key)
+        if entry is not None and entry[0] is factor_table:
+            return entry[1]
+        
+        component = self.factory.create_component(
+            component_type=component_data['component_type'],
+            name=component_data['name'],
+            metadata=metadata
+        )
+        with _component_instances_lock:
+            _component_instances[key] = (factor_table, component)
+        return component
+    
+    def _emissions_result(self, component_id: str, component_data: ComponentResponse, quantity: int, emissions: float) -> ComponentEmissionsResult:
+        """Shape a component emissions calculation for the API"""
+        return ComponentEmissionsResult(
+            component_id=component_id,
+            component_name=component_data['name'],
+            component_type=component_data['component_type'],
+            quantity=quantity,
+            emissions=round_emissions(emissions)
+        )
+    
     def get_component_template(self, component_type: ComponentType) -> Dict[str, Any]:
         """Get a template of required parameters for a component type"""
-        templates = {
-            ComponentType.ENERGY: {
-                "description": "Energy consumption system",
-                "required_metadata": ["energy_source", "efficiency", "annual_consumption_kwh"],
-                "optional_metadata": ["lifespan_years", "maintenance_factor"],
-                "example": {
-                    "energy_source": "electricity",
-                    "efficiency": 0.85,
-                    "annual_consumption_kwh": 50000
-                }
-            },
-            ComponentType.MATERIAL: {
-                "description": "Building material",
-                "required_metadata": ["material_name", "density_kg_m3", "volume_m3"],
-                "optional_metadata": ["recycling_rate", "transport_distance_km"],
-                "example": {
-                    "material_name": "concrete",
-                    "density_kg_m3": 2400,
-                    "volume_m3": 100
-                }
-            },
-            ComponentType.WATER: {
-                "description": "Water consumption system",
-                "required_metadata": ["annual_consumption_liters", "water_treatment_factor", "treatment_type"],
-                "optional_metadata": ["recycling_rate", "efficiency"],
-                "example": {
-                    "annual_consumption_liters": 100000,
-                    "water_treatment_factor": 0.8,
-                    "treatment_type": "standard"
-                }
-            },
-            ComponentType.TRANSPORT: {
-                "description": "Transportation system",
-                "required_metadata": ["vehicle_type", "fuel_type", "annual_distance_km"],
-                "optional_metadata": ["fuel_efficiency", "load_factor"],
-                "example": {
-                    "vehicle_type": "delivery_truck",
-                    "fuel_type": "diesel",
-                    "annual_distance_km": 20000
-                }
-            }
-        }
-        
-        return templates.get(component_type, {})
+        return _COMPONENT_TEMPLATES.get(component_type, {})
     
     def _validate_metadata(self, component_type: ComponentType, metadata: Dict[str, Any]) -> None:
         """Validate that required metadata are present for the component type"""
-        template = self.get_component_template(component_type)
-        required_metadata = template.get('required_metadata', [])
-        
-        missing_metadata = [param for param in required_metadata if param not in metadata]
+        missing_metadata = _REQUIRED_BY_TYPE.get(component_type, frozenset()) - metadata.keys()
         if missing_metadata:
-            raise ValueError(f"Missing required metadata for {component_type.value}: {missing_metadata}")
+            raise ValueError(f"Missing required metadata for {component_type.value}: {sorted(missing_metadata)}")
         
         # TODO: implement metadata validation here based on component type
         # example:
@@ -1,5 +1,10 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from postgrest.exceptions import APIError
 from src.data.repositories import EmissionFactorRepository
-from typing import List, Dict, Any, Optional, List
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 from src.core.models import (
     EmissionFactorCategory, 
     EmissionFactorCreate, 
@@ -7,23 +12,150 @@ from src.core.models import (
     EmissionFactorUpdate
 )
 
+logger = logging.getLogger(__name__)
+
+# Every unambiguous emission factor value keyed by (name, category), loaded at startup and
+# reloaded after changes. Pairs with more than one stored factor are kept apart so lookups can report them.
+_FACTOR_TABLE: Dict[Tuple[str, str], float] = {}
+_AMBIGUOUS_FACTORS: FrozenSet[Tuple[str, str]] = frozenset()
+_factor_table_stale = True
+_factor_table_loaded_at = 0.0
+_factor_table_loaded = False
+# Serialises reloads, so an expired table is read once rather than by every waiting thread
+_factor_table_lock = Lock()
+
+# Writes in this process mark the table stale at once; the TTL bounds how long changes made
+# through other worker processes take to show up
+FACTOR_TABLE_TTL_SECONDS = 60
+
+def _read_factor_table() -> Dict[Tuple[str, str], float]:
+    """Read all emission factors into the in-memory lookup table; the caller holds _factor_table_lock"""
+    global _FACTOR_TABLE, _AMBIGUOUS_FACTORS, _factor_table_stale, _factor_table_loaded_at, _factor_table_loaded
+    # Cleared before reading, so an invalidation that lands during the read triggers another reload
+    was_stale = _factor_table_stale
+    _factor_table_stale = False
+    _factor_table_loaded_at = time.monotonic()
+    try:
+        factors = EmissionFactorRepository().read_all()
+    except Exception:
+        if was_stale:
+            _factor_table_stale = True
+        raise
+    
+    table: Dict[Tuple[str, str], float] = {}
+    ambiguous = set()
+    for factor in factors:
+        key = (factor['name'], factor['category'])
+        if key in table:
+            ambiguous.add(key)
+        table[key] = float(factor['emission_factor'])
+    for key in ambiguous:
+        del table[key]
+    _FACTOR_TABLE, _AMBIGUOUS_FACTORS, _factor_table_loaded = table, frozenset(ambiguous), True
+    return table
+
+def _load_factor_table() -> Dict[Tuple[str, str], float]:
+    """Read all emission factors into the in-memory lookup table"""
+    with _factor_table_lock:
+        return _read_factor_table()
+
+def _factor_table_expired() -> bool:
+    """Whether the factor table must be reloaded before use"""
+    return _factor_table_stale or time.monotonic() - _factor_table_loaded_at > FACTOR_TABLE_TTL_SECONDS
+
+def _factor_table() -> Dict[Tuple[str, str], float]:
+    """Get the emission factor table, reloading it if the factor library changed or the TTL ran out"""
+    if not _factor_table_expired():
+        return _FACTOR_TABLE
+    
+    with _factor_table_lock:
+        # Another thread may have reloaded the table while this one waited
+        if not _factor_table_expired():
+            return _FACTOR_TABLE
+        stale = _factor_table_stale
+        try:
+            return _read_factor_table()
+        except Exception:
+            # Only a reload due to the TTL may fall back to the table already in memory; it is retried
+            # after another TTL. A write in this process or a missing table still has to fail.
+            if stale or not _factor_table_loaded:
+                raise
+            logger.exception("Reloading emission factors failed; keeping the previous table")
+            return _FACTOR_TABLE
+
+# Rows per multi-row insert in bulk import, keeping each PostgREST request body bounded
+BULK_INSERT_CHUNK_SIZE = 1000
+# Chunk inserts sent concurrently when an import spans several chunks
+BULK_INSERT_WORKERS = 4
+
+# Category values accepted by bulk import, checked without building EmissionFactorCreate models
+_FACTOR_CATEGORIES = frozenset(category.value for category in EmissionFactorCategory)
+
+def _check_factor_row(row: Any) -> EmissionFactorCreate:
+    """Check a raw bulk-import row has the EmissionFactorCreate fields and types"""
+    if not isinstance(row, dict):
+        raise ValueError("Emission factor must be an object")
+    for field in ('name', 'unit'):
+        if not isinstance(row.get(field), str):
+            raise ValueError(f"Emission factor {field} must be a string")
+    if row.get('category') not in _FACTOR_CATEGORIES:
+        raise ValueError(f"Emission factor category must be one of: {', '.join(sorted(_FACTOR_CATEGORIES))}")
+    value = row.get('emission_factor')
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("Emission factor value must be a number")
+    source = row.get('source')
+    if source is not None and not isinstance(source, str):
+        raise ValueError("Emission factor source must be a string")
+    
+    return {
+        'name': row['name'],
+        'category': row['category'],
+        'emission_factor': float(value),
+        'unit': row['unit'],
+        'source': source
+    }
+
+def _lookup_factor(name: str, category: str) -> float:
+    """Get the emission factor value for a name and category from the in-memory table"""
+    value = _factor_table().get((name, category))
+    if value is None:
+        if (name, category) in _AMBIGUOUS_FACTORS:
+            raise ValueError(f"Multiple emission factors found for {name}")
+        raise ValueError(f"No emission factors found for {name}")
+    return value
+
 class EmissionFactorService:
     def __init__(self):
         self.emission_factor_repo = EmissionFactorRepository()
     
+    def load_all(self) -> Dict[Tuple[str, str], float]:
+        """(Re)load all emission factors into memory so calculations need no queries"""
+        return _load_factor_table()
+    
+    def get_factor_table(self) -> Dict[Tuple[str, str], float]:
+        """Get the current in-memory factor table; a reload replaces it with a new dict"""
+        return _factor_table()
+    
+    def invalidate_cache(self) -> None:
+        """Mark the in-memory factor table for reload after the factor library changes"""
+        global _factor_table_stale
+        _factor_table_stale = True
+    
     def create_emission_factor(self, emission_factor_data: EmissionFactorCreate) -> EmissionFactorResponse:
         """Create a new emission factor"""
         # Validate that emission factor is positive
         if emission_factor_data.get('emission_factor', 0) < 0:
             raise ValueError("Emission factor must be positive")
         
-        return self.emission_factor_repo.create(emission_factor_data)
+        result = self.emission_factor_repo.create(emission_factor_data)
+        self.invalidate_cache()
+        return result
     
     def get_emission_factor(self, factor_id: str) -> Optional[EmissionFactorResponse]:
         """Get a specific emission factor by ID"""
         return self.emission_factor_repo.get_by_id(factor_id)
     
-    def get_all_emission_factors(self) -> List[EmissionFactorResponse]:
+    def get_all_emission_factors(self) -> Tuple[EmissionFactorResponse, ...]:
         """Get all emission factors"""
         return self.emission_factor_repo.get_all()
     
@@ -31,51 +163,100 @@ class EmissionFactorService:
         """Get emission factors by category and source"""
         return self.emission_factor_repo.get_by_name_and_category(name, category.value)
     
-    def get_emission_factors_by_category(self, category: EmissionFactorCategory) -> List[EmissionFactorResponse]:
+    def bulk_get_by_sources(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        """Get emission factor values for many (name, category) pairs from the in-memory table"""
+        table = _factor_table()
+
+        # Missing or ambiguous pairs are left out; _lookup_factor raises the specific error for them
+        return {key: table[key] for key in set(pairs) if key in table}
+
+    def get_emission_factors_by_category(self, category: EmissionFactorCategory) -> Tuple[EmissionFactorResponse, ...]:
         """Get emission factors by category"""
         return self.emission_factor_repo.get_by_category(category.value)
     
     def update_emission_factor(self, factor_id: str, updates: EmissionFactorUpdate) -> EmissionFactorResponse:
         """Update an emission factor"""
-        factor = self.emission_factor_repo.get_by_id(factor_id)
-        if not factor:
-            raise ValueError(f"Emission factor {factor_id} not found")
-        
         # Validate emission factor if it's being updated
         if 'emission_factor' in updates and updates['emission_factor'] < 0:
             raise ValueError("Emission factor must be positive")
         
-        return self.emission_factor_repo.update(factor_id, updates)
+        # The update returns no row for an unknown id, so no separate existence check is needed
+        result = self.emission_factor_repo.update(factor_id, updates)
+        if result is None:
+            raise ValueError(f"Emission factor {factor_id} not found")
+        self.invalidate_cache()
+        return result
     
     def delete_emission_factor(self, factor_id: str) -> dict:
         """Delete an emission factor"""
-        factor = self.emission_factor_repo.get_by_id(factor_id)
-        if not factor:
-            raise ValueError(f"Emission factor {factor_id} not found")
-        
         result = self.emission_factor_repo.delete(factor_id)
+        if result is None:
+            raise ValueError(f"Emission factor {factor_id} not found")
+        self.invalidate_cache()
         return result
     
-    def bulk_import_factors(self, factors_data: List[EmissionFactorCreate]) -> Dict[str, Any]:
-        """Import multiple emission factors at once"""
-        successful = 0
-        failed = 0
+    def bulk_import_factors(self, factors_data: List[Any]) -> Dict[str, Any]:
+        """Import multiple emission factors at once from raw JSON rows"""
+        valid = []
         errors = []
         
         for factor_data in factors_data:
             try:
-                self.create_emission_factor(factor_data)
-                successful += 1
-            except Exception as e:
-                failed += 1
+                factor = _check_factor_row(factor_data)
+                if factor['emission_factor'] < 0:
+                    raise ValueError("Emission factor must be positive")
+                valid.append(factor)
+            except ValueError as e:
                 errors.append({
                     'factor_data': factor_data,
                     'error': str(e)
                 })
         
+        chunks = [valid[start:start + BULK_INSERT_CHUNK_SIZE] for start in range(0, len(valid), BULK_INSERT_CHUNK_SIZE)]
+        if len(chunks) > 1:
+            # Each chunk is its own request, so they can share the HTTP pool concurrently
+            with ThreadPoolExecutor(max_workers=min(BULK_INSERT_WORKERS, len(chunks))) as executor:
+                outcomes = list(executor.map(self._insert_chunk, chunks))
+        else:
+            outcomes = [self._insert_chunk(chunk) for chunk in chunks]
+        
+        successful = 0
+        for chunk_successful, chunk_errors in outcomes:
+            successful += chunk_successful
+            errors.extend(chunk_errors)
+        if valid:
+            self.invalidate_cache()
+        
         return {
             'total_processed': len(factors_data),
             'successful': successful,
-            'failed': failed,
+            'failed': len(errors),
             'errors': errors
-        }
\ No newline at end of file
+        }
+    
+    def _insert_chunk(self, factors: List[EmissionFactorCreate]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Insert validated factors in one request, returning the success count and per-row errors"""
+        try:
+            self.emission_factor_repo.create_many(factors)
+            return len(factors), []
+        except APIError:
+            pass
+        except Exception as e:
+            # A transport error (e.g. a read timeout) may come after the insert committed, so retrying
+            # could store every row twice; report the whole chunk as failed instead
+            error = f"Insert request failed, rows may or may not have been stored: {e}"
+            return 0, [{'factor_data': factor, 'error': error} for factor in factors]
+        
+        # PostgREST rejected the chunk, so nothing was stored; retry row by row to report which rows fail
+        successful = 0
+        errors = []
+        for factor in factors:
+            try:
+                self.emission_factor_repo.create(dict(factor))
+                successful += 1
+            except Exception as e:
+                errors.append({
+                    'factor_data': factor,
+                    'error': str(e)
+                })
+        return successful, errors
\ No newline at end of file
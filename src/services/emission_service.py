@@ -1,10 +1,5 @@
 from src.data.repositories import ComponentRepository
 from src.core.factory import ComponentFactory
-from typing import List, Dict, Any, Optional, List
-from src.core.models import (
-    EmissionFactorCategory, 
-    EmissionFactorResponse
-)
 
 class EmissionService:
     def __init__(self):
@@ -20,6 +15,6 @@ class EmissionService:
         component = self.factory.create_component(
             component_type=component_data['component_type'],
             name=component_data['name'],
-            **component_data['parameters']
+            metadata=component_data['metadata']
         )
         return component.calculate_emissions(quantity)
\ No newline at end of file